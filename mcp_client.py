@@ -1,39 +1,226 @@
 import asyncio
+import functools
 import logging
+import hashlib
 import json
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any
 import google.generativeai as genai
 from dotenv import load_dotenv
 import os
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from mcp.types import TextContent
+from mcp_common import HIDDEN_TOOLS, ainput, cast_input_to_type
 
-load_dotenv()
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s: %(message)s")
+load_dotenv()
 
 # Configure Gemini
 genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
 
-# Tools that should be hidden from the user menu (internal/utility tools)
-HIDDEN_TOOLS = {
-    'evaluate_javascript',  # Used internally by get_clickable_elements and other tools
-    'wait_for_element',     # Used internally by click_element and other tools
-    'get_form_elements'     # Used internally by form filling interface
+# Compiled once: locates the head of a TOOL_CALL block up to its opening
+# brace; the JSON body is sliced out by the balanced-brace scanner below
+# rather than a DOTALL '.*?' that backtracks and truncates nested objects
+_TOOL_CALL_HDR_RE = re.compile(r'TOOL_CALL:\s*(\w+)\s*PARAMETERS:\s*\{')
+
+def _scan_json_object(text, start):
+    """Return the index one past the balanced object opening at start, or -1.
+
+    Single forward pass tracking brace depth, skipping braces inside JSON
+    strings; no regex backtracking on adversarial model output.
+    """
+    depth = 0
+    in_str = False
+    escaped = False
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_str:
+            if escaped:
+                escaped = False
+            elif c == '\\':
+                escaped = True
+            elif c == '"':
+                in_str = False
+        elif c == '"':
+            in_str = True
+        elif c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return -1
+
+def _iter_tool_calls(text):
+    """Yield (tool_name, param_json, end_index) for each complete block.
+
+    Blocks whose JSON object is still unterminated (mid-stream) are not
+    yielded; callers rescan once more text has arrived.
+    """
+    pos = 0
+    while True:
+        header = _TOOL_CALL_HDR_RE.search(text, pos)
+        if not header:
+            return
+        start = header.end() - 1  # the opening '{'
+        end = _scan_json_object(text, start)
+        if end < 0:
+            return
+        yield header.group(1), text[start:end], end
+        pos = end
+
+# Cap on tool-result text kept in memory / echoed back to Gemini
+_MAX_RESULT_CHARS = 8192
+
+# Page-info payloads past this size are forwarded truncated instead of parsed
+_PAGE_INFO_MAX_CHARS = 65_536
+
+# Short-lived cache of clickable elements keyed by the last navigated URL,
+# invalidated whenever a DOM-mutating tool runs
+_CLICKABLE_TTL = 2.0
+_CLICKABLE_CACHE = {}
+_DOM_MUTATING_TOOLS = frozenset({'click_element', 'click_link_by_index', 'navigate_to', 'fill_form', 'fill_forms'})
+_current_page_url = ""
+
+# Read-only tools that are safe to run concurrently; anything not listed
+# here is treated as mutating and keeps its relative order, so a new server
+# tool defaults to the safe sequential path until it is added
+_PARALLEL_SAFE_TOOLS = frozenset({
+    'get_page_info', 'get_clickable_elements', 'list_links_with_context',
+    'get_form_elements', 'extract_text', 'extract_texts',
+    'take_screenshot', 'wait_for_element',
+})
+
+def _is_sequential(tool_name: str) -> bool:
+    return tool_name not in _PARALLEL_SAFE_TOOLS
+
+# Commands that leave AI assistant mode
+_EXIT_COMMANDS = frozenset({'back', 'exit', 'quit'})
+
+# Entries (user + model messages) of chat history resent to Gemini per turn.
+# GenerateContent is stateless, so the SDK ships the whole list every call;
+# without a cap, per-turn bytes and billed input tokens grow with session age.
+_CHAT_HISTORY_MAX = 20
+
+# Extraction patterns for the pre-router, compiled once at import so the hot
+# input path never pays re.compile's cache lookup
+# One alternation handles full URLs and bare domains in a single scan; the
+# named groups tell the builder whether a scheme needs to be prefixed
+_URL_OR_DOMAIN_RE = re.compile(
+    r"^\s*(?:go to|navigate to|open)\s+"
+    r"(?:(?P<url>https?://\S+)|(?P<domain>(?:www\.)?[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}))\s*$",
+    re.I)
+_SCREENSHOT_RE = re.compile(r"^\s*(?:take (?:a )?screenshot|screenshot)\s*$", re.I)
+_SAVE_RE = re.compile(r"^\s*(?:take (?:a )?screenshot|screenshot)\s+(?:and\s+)?save (?:as|to)\s+(\S+\.png)\s*$", re.I)
+_PAGE_INFO_RE = re.compile(r"^\s*what'?s on this page\??\s*$", re.I)
+_EXTRACT_RE = re.compile(r"^\s*(?:extract|get)(?: the)? text (?:from|of)\s+[\"']([^\"']+)[\"']\s*$", re.I)
+# Selector and value come out of one pass; a separate 'with ...' search
+# would rescan the same input
+_FILL_RE = re.compile(r"^\s*fill\s+[\"']([^\"']+)[\"'].*\bwith\s+[\"']([^\"']+)[\"']\s*$", re.I)
+_WAIT_RE = re.compile(
+    r"^\s*wait for\s+[\"']([^\"']+)[\"']"
+    r"(?:\s+(?:for\s+)?(\d+)\s*(seconds?|ms|milliseconds?))?\s*$", re.I)
+
+def _wait_params(m):
+    params = {"selector": m.group(1)}
+    if m.group(2):
+        # The unit comes out of the same match; no second scan over the input
+        n = int(m.group(2))
+        params["timeout"] = n * 1000 if m.group(3).lower().startswith('s') else n
+    return params
+
+# Deterministic pre-router: requests with a trivial 1:1 tool mapping are
+# dispatched directly, skipping the Gemini round-trip entirely. Routes are
+# keyed by the first word of the command, so a turn tries only the one or
+# two patterns that can actually match instead of scanning the whole table.
+# Each route carries an optional guard substring: a C-level `in` check that
+# must hit before the pattern is even tried, so near-miss inputs that share a
+# trigger word ("get the weather") never reach the regex engine.
+_NAV_ROUTE = ('.', _URL_OR_DOMAIN_RE, "navigate_to",
+              lambda m: {"url": m.group('url') or 'https://' + m.group('domain')})
+_SHOT_ROUTES = (
+    ('.png', _SAVE_RE, "take_screenshot", lambda m: {"path": m.group(1)}),
+    (None, _SCREENSHOT_RE, "take_screenshot", lambda m: {}),
+)
+_EXTRACT_ROUTE = ('text', _EXTRACT_RE, "extract_text", lambda m: {"selector": m.group(1)})
+
+_ROUTES_BY_TRIGGER = {
+    'go': (_NAV_ROUTE,),
+    'navigate': (_NAV_ROUTE,),
+    'open': (_NAV_ROUTE,),
+    'take': _SHOT_ROUTES,
+    'screenshot': _SHOT_ROUTES,
+    "what's": ((None, _PAGE_INFO_RE, "get_page_info", lambda m: {}),),
+    'whats': ((None, _PAGE_INFO_RE, "get_page_info", lambda m: {}),),
+    'extract': (_EXTRACT_ROUTE,),
+    'get': (_EXTRACT_ROUTE,),
+    'fill': (('with', _FILL_RE, "fill_form",
+              lambda m: {"selector": m.group(1), "value": m.group(2)}),),
+    'wait': (('for', _WAIT_RE, "wait_for_element", _wait_params),),
 }
 
-def cast_input_to_type(value: str, type_hint: str):
-    try:
-        if type_hint == "integer":
-            return int(value)
-        elif type_hint == "number":
-            return float(value)
-        elif type_hint == "boolean":
-            return value.lower() in ["true", "1", "yes", "y"]
-        else:
-            return value
-    except ValueError:
-        raise ValueError(f"Invalid input '{value}' for expected type {type_hint}")
+@functools.lru_cache(maxsize=256)
+def _match_fast_route(text):
+    """Resolve a command to (tool_name, params-as-items) or None.
+
+    Pure function of the input text, so retyped commands hit the LRU and
+    skip the trigger lookup, guards, and regexes entirely. Params are
+    returned as a tuple of items because lru_cache needs hashable values.
+    """
+    tokens = text.split(None, 1)
+    if not tokens:
+        return None
+    first = tokens[0].lower()
+    if first == 'click':
+        # "click #some-id": slice the fragment out directly; no regex and no
+        # intermediate split() lists for the most common click shorthand
+        i = text.find('#')
+        if i >= 0:
+            j = i + 1
+            while j < len(text) and not text[j].isspace():
+                j += 1
+            if j > i + 1:
+                return 'click_element', (('selector', text[i:j]),)
+        return None
+    routes = _ROUTES_BY_TRIGGER.get(first)
+    if not routes:
+        return None
+    for guard, pattern, tool_name, build_params in routes:
+        if guard is not None and guard not in text:
+            continue
+        match = pattern.match(text)
+        if match:
+            return tool_name, tuple(build_params(match).items())
+    return None
+
+# Cache of (tools_info, tools_info_json, system_prompt) keyed by the tool set,
+# so re-creating an agent for the same server skips the schema reflection work
+_PROMPT_CACHE = {}
+
+# LRU of parsed parameter metadata keyed by a digest of the tool inputSchema
+_PARSED_SCHEMA_CACHE = OrderedDict()
+_PARSED_SCHEMA_CACHE_SIZE = 256
+
+# GenerativeModel instances keyed by system prompt; constructing one re-parses
+# the model config, so reuse it when the same tool set reconnects
+_MODEL_CACHE = {}
+
+def _get_model(system_prompt):
+    model = _MODEL_CACHE.get(system_prompt)
+    if model is None:
+        model = genai.GenerativeModel('models/gemini-1.5-flash',
+                                      system_instruction=system_prompt)
+        _MODEL_CACHE[system_prompt] = model
+    return model
 
 def show_main_menu():
     """Display the main application menu"""
@@ -46,11 +233,8 @@ def show_main_menu():
     print("4. 🚪 Quit")
     print("=" * 60)
 
-def show_tools_menu(available_tools):
-    """Display tools in a compact format, excluding internal tools"""
-    # Filter out hidden tools
-    visible_tools = [tool for tool in available_tools if tool.name not in HIDDEN_TOOLS]
-    
+def show_tools_menu(visible_tools):
+    """Display tools in a compact format; expects an already-filtered list"""
     print("\n" + "=" * 60)
     print("AVAILABLE TOOLS:")
     print("=" * 60)
@@ -58,17 +242,73 @@ def show_tools_menu(available_tools):
         print(f"{idx + 1:2d}. {tool.name:<20} | {tool.description}")
     print("=" * 60)
     print("Commands: [tool number] | 'b' back | 'h' for help")
-    
-    return visible_tools  # Return filtered list
+
+    return visible_tools
 
 class GeminiMCPAgent:
-    def __init__(self, session, available_tools):
+    # Fixed attribute set: slot access skips the per-instance __dict__
+    __slots__ = ('session', 'visible_tools', '_tools_by_name', '_required',
+                 'tools_info', '_tools_info_json', 'system_prompt', 'model',
+                 'chat', 'conversation_history', '_call_semaphore')
+
+    def __init__(self, session, visible_tools):
         self.session = session
-        self.available_tools = available_tools
-        self.visible_tools = [tool for tool in available_tools if tool.name not in HIDDEN_TOOLS]
-        self.model = genai.GenerativeModel('models/gemini-1.5-flash')
-        self.conversation_history = []
-        self.system_prompt = self.create_system_prompt()
+        # The caller filters HIDDEN_TOOLS once at connect time
+        self.visible_tools = list(visible_tools)
+        # O(1) dispatch index instead of scanning visible_tools per tool call
+        self._tools_by_name = {t.name: t for t in self.visible_tools}
+        # Required-parameter sets, resolved once so the per-call missing-param
+        # check is a single set difference
+        self._required = {
+            t.name: frozenset(t.inputSchema.get('required', ()))
+            for t in self.visible_tools if isinstance(t.inputSchema, dict)
+        }
+        cache_key = tuple((t.name, id(t.inputSchema)) for t in self.visible_tools)
+        cached = _PROMPT_CACHE.get(cache_key)
+        if cached is None:
+            tools_info = self.get_tools_info()
+            tools_info_json = json.dumps(tools_info, indent=2)
+            cached = (tools_info, tools_info_json, self.create_system_prompt(tools_info_json))
+            _PROMPT_CACHE[cache_key] = cached
+        self.tools_info, self._tools_info_json, self.system_prompt = cached
+        # System prompt goes in once via system_instruction instead of being
+        # re-concatenated into every per-turn prompt
+        self.model = _get_model(self.system_prompt)
+        # One chat for the whole session; history is truncated to
+        # _CHAT_HISTORY_MAX entries after each turn since the SDK resends
+        # the full list on every request
+        self.chat = self.model.start_chat(history=[])
+        # Local record of recent turns, kept only for logging/debugging
+        self.conversation_history = deque(maxlen=10)
+        # Caps in-flight MCP requests so parallel dispatch can't flood the session
+        self._call_semaphore = asyncio.Semaphore(4)
+
+    async def execute_tool_calls_parallel(self, tool_calls):
+        """Execute tool calls, running independent ones concurrently.
+
+        Calls whose tool is not known read-only mutate browser state, so
+        they act as barriers: pending independent calls are flushed first,
+        then the sequential call runs alone.
+        """
+        results = [None] * len(tool_calls)
+        pending = []
+
+        async def run(index, name, params):
+            results[index] = await self.execute_tool_call(name, params)
+
+        for i, (tool_name, parameters) in enumerate(tool_calls):
+            if _is_sequential(tool_name):
+                if pending:
+                    logging.info(f"Dispatching {len(pending)} independent tool call(s) concurrently")
+                    await asyncio.gather(*pending)
+                    pending = []
+                results[i] = await self.execute_tool_call(tool_name, parameters)
+            else:
+                pending.append(run(i, tool_name, parameters))
+        if pending:
+            logging.info(f"Dispatching {len(pending)} independent tool call(s) concurrently")
+            await asyncio.gather(*pending)
+        return results
 
     def get_tools_info(self):
         tools_info = []
@@ -76,31 +316,50 @@ class GeminiMCPAgent:
             tool_info = {
                 "name": tool.name,
                 "description": tool.description,
-                "parameters": {}
+                "parameters": self._parse_tool_schema(getattr(tool, 'inputSchema', {}))
             }
-            schema = getattr(tool, 'inputSchema', {})
-            if isinstance(schema, dict) and "properties" in schema:
-                properties = schema.get("properties", {})
-                required = schema.get("required", [])
-                for param, definition in properties.items():
-                    param_info = {
-                        "type": definition.get("type", "string"),
-                        "description": definition.get("description", ""),
-                        "required": param in required
-                    }
-                    if "enum" in definition:
-                        param_info["choices"] = definition["enum"]
-                    if "default" in definition:
-                        param_info["default"] = definition["default"]
-                    tool_info["parameters"][param] = param_info
             tools_info.append(tool_info)
         return tools_info
 
-    def create_system_prompt(self):
-        tools_info = self.get_tools_info()
+    @staticmethod
+    def _parse_tool_schema(schema):
+        """Parse an inputSchema into parameter metadata, caching by content hash.
+
+        Identical schemas (common across reconnects and servers with shared
+        parameter shapes) are parsed once and reused.
+        """
+        if not (isinstance(schema, dict) and "properties" in schema):
+            return {}
+        key = hashlib.blake2b(
+            json.dumps(schema, sort_keys=True).encode(), digest_size=16
+        ).hexdigest()
+        cached = _PARSED_SCHEMA_CACHE.get(key)
+        if cached is not None:
+            _PARSED_SCHEMA_CACHE.move_to_end(key)
+            return cached
+        parameters = {}
+        properties = schema.get("properties", {})
+        required = schema.get("required", [])
+        for param, definition in properties.items():
+            param_info = {
+                "type": definition.get("type", "string"),
+                "description": definition.get("description", ""),
+                "required": param in required
+            }
+            if "enum" in definition:
+                param_info["choices"] = definition["enum"]
+            if "default" in definition:
+                param_info["default"] = definition["default"]
+            parameters[param] = param_info
+        _PARSED_SCHEMA_CACHE[key] = parameters
+        if len(_PARSED_SCHEMA_CACHE) > _PARSED_SCHEMA_CACHE_SIZE:
+            _PARSED_SCHEMA_CACHE.popitem(last=False)
+        return parameters
+
+    def create_system_prompt(self, tools_info_json):
         return f"""You are an intelligent browser automation assistant. You have access to these MCP tools for web automation:
 
-{json.dumps(tools_info, indent=2)}
+{tools_info_json}
 
 Your role is to:
 1. Understand user requests for web automation tasks
@@ -146,18 +405,23 @@ Be conversational, helpful, and proactive in suggesting next steps.
         try:
             page_info_result = await self.session.call_tool("get_page_info")
             page_info = {}
-            if hasattr(page_info_result, 'content') and page_info_result.content:
+            if page_info_result.content:
                 for content_item in page_info_result.content:
-                    if hasattr(content_item, 'text'):
+                    if isinstance(content_item, TextContent):
                         raw_text = content_item.text.strip()
                         
                         # 🧪 Added debug log
                         print(f"[DEBUG] Raw page_info text: {raw_text[:300]}...")  # Print first 300 characters
-                        
+
+                        # Bound worst-case parse time and prompt size: a rich
+                        # page can return hundreds of KB of page info
+                        if len(raw_text) > _PAGE_INFO_MAX_CHARS:
+                            page_info = {"raw_content_truncated": raw_text[:_PAGE_INFO_MAX_CHARS]}
+                            continue
                         try:
-                            # ✅ Attempt JSON parsing
-                            page_info = json.loads(raw_text)
-                        except json.JSONDecodeError:
+                            # ✅ Attempt JSON parsing (orjson when available)
+                            page_info = _json_loads(raw_text)
+                        except ValueError:
                             # 🛡️ Fallback: deliver raw text so Gemini can work with it
                             page_info = {"raw_content": raw_text}
             return page_info
@@ -167,88 +431,201 @@ Be conversational, helpful, and proactive in suggesting next steps.
 
     async def execute_tool_call(self, tool_name, parameters):
         try:
-            tool = next((t for t in self.visible_tools if t.name == tool_name), None)
-            if not tool:
+            tool = self._tools_by_name.get(tool_name)
+            if not tool and tool_name not in HIDDEN_TOOLS:
                 return {"error": f"Tool '{tool_name}' not found"}
+            # Hidden tools are menu-filtered, not uncallable: the fast
+            # router dispatches wait_for_element through here
+            missing = self._required.get(tool_name, frozenset()) - parameters.keys()
+            if missing:
+                return {"error": f"Missing required parameters for {tool_name}: {', '.join(sorted(missing))}"}
             print(f"🔧 Executing: {tool_name}")
             if parameters:
                 print(f"📊 Parameters: {parameters}")
-            result = await self.session.call_tool(tool_name, arguments=parameters)
+            async with self._call_semaphore:
+                result = await self.session.call_tool(tool_name, arguments=parameters)
             result_text = ""
-            if hasattr(result, 'content') and result.content:
-                for content_item in result.content:
-                    if hasattr(content_item, 'text'):
-                        result_text += content_item.text
+            if result.content:
+                # Content types are known; one isinstance beats the
+                # hasattr/getattr probing per item
+                result_text = "".join(ci.text for ci in result.content
+                                      if isinstance(ci, TextContent))
+            if len(result_text) > _MAX_RESULT_CHARS:
+                truncated = len(result_text) - _MAX_RESULT_CHARS
+                result_text = f"{result_text[:_MAX_RESULT_CHARS]}...[+{truncated} chars truncated]"
+            _invalidate_element_cache(tool_name, parameters)
             return {"success": True, "result": result_text}
         except Exception as e:
             return {"error": f"Failed to execute {tool_name}: {str(e)}"}
 
     def parse_gemini_response(self, response_text):
-        import re
         tool_calls = []
-        pattern = r'TOOL_CALL:\s*(\w+)\s*PARAMETERS:\s*(\{.*?\})(?=\nTOOL_CALL:|$)'
-        matches = re.findall(pattern, response_text, re.DOTALL)
-        for tool_name, param_json in matches:
+        for tool_name, param_json, _end in _iter_tool_calls(response_text):
             try:
                 params = json.loads(param_json)
             except json.JSONDecodeError:
                 params = {}
-            tool_calls.append((tool_name.strip(), params))
+            tool_calls.append((tool_name, params))
         return tool_calls, response_text
 
+    def _report_tool_result(self, tool_name, result):
+        if result.get("error"):
+            print(f"❌ Error: {result['error']}")
+            self.conversation_history.append(f"Assistant: Error executing {tool_name}: {result['error']}")
+        else:
+            print(f"✅ {tool_name} completed successfully")
+            if result.get("result"):
+                print(f"📋 Result: {result['result'][:200]}...")
+            self.conversation_history.append(f"Assistant: Successfully executed {tool_name}")
+
     async def handle_user_request(self, user_input):
         try:
-            page_context = await self.get_current_page_context()
-            context_msg = f"Current page context: {json.dumps(page_context, indent=2)}\n\nUser request: {user_input}"
+            # Trivially deterministic requests skip the LLM round-trip
+            routed = _match_fast_route(user_input)
+            if routed is not None:
+                tool_name, param_items = routed
+                print(f"⚡ Direct dispatch: {tool_name}")
+                self.conversation_history.append(f"User: {user_input}")
+                result = await self.execute_tool_call(tool_name, dict(param_items))
+                self._report_tool_result(tool_name, result)
+                return
+
+            # Kick off the MCP round-trip early so it overlaps the local work
+            ctx_task = asyncio.create_task(self.get_current_page_context())
             self.conversation_history.append(f"User: {user_input}")
-            conversation_context = "\n".join(self.conversation_history[-10:])
-            full_prompt = f"{self.system_prompt}\n\nConversation History:\n{conversation_context}\n\nCurrent Context:\n{context_msg}"
             print("🤖 Thinking...")
-            chat = self.model.start_chat(history=[])
-            response = await chat.send_message_async(full_prompt)
-            if not response.text:
+            page_context = await ctx_task
+            # Compact separators: this JSON is only read by the model, and
+            # pretty-printing roughly doubles the bytes sent per turn
+            context_msg = f"Current page context: {json.dumps(page_context, separators=(',', ':'))}\n\nUser request: {user_input}"
+
+            # Stream the response so complete TOOL_CALL blocks can start
+            # executing while Gemini is still generating. Read-only tools are
+            # dispatched immediately; once a state-mutating tool appears, it
+            # and everything after it are deferred to preserve ordering.
+            stream = await self.chat.send_message_async(context_msg, stream=True)
+            parts = []           # full transcript, joined once at the end
+            tail = ""            # unscanned suffix; dispatched blocks are cut off
+            early_calls = []     # (tool_name, parameters, task)
+            deferred_calls = []  # (tool_name, parameters)
+
+            def dispatch(tool_name, param_json):
+                try:
+                    params = json.loads(param_json)
+                except json.JSONDecodeError:
+                    params = {}
+                if _is_sequential(tool_name) or deferred_calls:
+                    deferred_calls.append((tool_name, params))
+                else:
+                    task = asyncio.create_task(self.execute_tool_call(tool_name, params))
+                    early_calls.append((tool_name, params, task))
+
+            async for chunk in stream:
+                chunk_text = getattr(chunk, 'text', '') or ''
+                if not chunk_text:
+                    continue
+                parts.append(chunk_text)
+                tail += chunk_text
+                last_end = 0
+                # Unterminated blocks are simply not yielded yet; a balanced
+                # object is complete JSON, so it can dispatch immediately
+                for tool_name, param_json, end in _iter_tool_calls(tail):
+                    dispatch(tool_name, param_json)
+                    last_end = end
+                if last_end:
+                    # Drop dispatched blocks so the scan window stays small
+                    # instead of growing with the whole response
+                    tail = tail[last_end:]
+
+            response_text = ''.join(parts)
+            if not response_text:
                 print("❌ No response from Gemini")
                 return
-            tool_calls, explanation = self.parse_gemini_response(response.text)
-            print(f"\n🤖 Gemini: {explanation}")
-            if tool_calls:
-                print(f"\n🔧 Executing {len(tool_calls)} tool call(s)...")
-                for tool_name, parameters in tool_calls:
-                    result = await self.execute_tool_call(tool_name, parameters)
-                    if result.get("error"):
-                        print(f"❌ Error: {result['error']}")
-                        self.conversation_history.append(f"Assistant: Error executing {tool_name}: {result['error']}")
-                    else:
-                        print(f"✅ {tool_name} completed successfully")
-                        if result.get("result"):
-                            print(f"📋 Result: {result['result'][:200]}...")
-                        self.conversation_history.append(f"Assistant: Successfully executed {tool_name}")
-            self.conversation_history.append(f"Assistant: {explanation}")
+            print(f"\n🤖 Gemini: {response_text}")
+            total_calls = len(early_calls) + len(deferred_calls)
+            if total_calls:
+                print(f"\n🔧 Executing {total_calls} tool call(s)...")
+                for tool_name, parameters, task in early_calls:
+                    self._report_tool_result(tool_name, await task)
+                if deferred_calls:
+                    results = await self.execute_tool_calls_parallel(deferred_calls)
+                    for (tool_name, parameters), result in zip(deferred_calls, results):
+                        self._report_tool_result(tool_name, result)
+            self.conversation_history.append(f"Assistant: {response_text}")
+            # Keep the resent transcript bounded; old turns fall off the
+            # front (the system prompt lives in system_instruction, not here)
+            if len(self.chat.history) > _CHAT_HISTORY_MAX:
+                self.chat.history = self.chat.history[-_CHAT_HISTORY_MAX:]
         except Exception as e:
             print(f"❌ Error processing request: {e}")
             logging.error(f"Gemini processing error: {e}")
 
 
+def _invalidate_element_cache(tool_name, parameters=None):
+    """Drop cached clickable elements after any tool that can change the DOM."""
+    global _current_page_url
+    if tool_name in _DOM_MUTATING_TOOLS:
+        _CLICKABLE_CACHE.clear()
+        if tool_name == 'navigate_to' and parameters:
+            _current_page_url = parameters.get('url', '')
+
 async def get_clickable_elements_data(session):
+    cached = _CLICKABLE_CACHE.get(_current_page_url)
+    if cached and time.monotonic() - cached[0] < _CLICKABLE_TTL:
+        return cached[1], cached[2]
     try:
         response = await session.call_tool("get_clickable_elements")
-        if hasattr(response, "content") and response.content:
+        if response.content:
             for content_item in response.content:
-                if hasattr(content_item, "text"):
+                if isinstance(content_item, TextContent):
                     try:
                         data = json.loads(content_item.text)
-                        return data.get("elements", []), data.get("error")
+                        elements, error = data.get("elements", []), data.get("error")
+                        _CLICKABLE_CACHE[_current_page_url] = (time.monotonic(), elements, error)
+                        return elements, error
                     except json.JSONDecodeError:
                         return [], content_item.text
         return [], "No response content"
     except Exception as e:
         return [], f"Failed to fetch elements: {e}"
 
-async def get_user_input_for_param(session, selected_tool, param, definition, is_required=False):
-    param_desc = definition.get("description", "")
-    default_val = definition.get("default")
-    choices = definition.get("enum")
-    type_hint = definition.get("type", "string")
+@dataclass(slots=True)
+class ParamSpec:
+    """One tool parameter, materialized from its inputSchema entry.
+
+    Built once per parameter so the interactive prompt loops read plain
+    attributes instead of re-walking the schema dict on every retry.
+    """
+    name: str
+    description: str
+    default: Any
+    choices: list | None
+    type_hint: str
+    required: bool
+
+def build_param_specs(schema):
+    """Turn a tool inputSchema into a list of ParamSpec (empty if no params)."""
+    if not isinstance(schema, dict) or not schema:
+        return []
+    properties = schema.get("properties", {})
+    required = schema.get("required", [])
+    return [
+        ParamSpec(param,
+                  definition.get("description", ""),
+                  definition.get("default"),
+                  definition.get("enum"),
+                  definition.get("type", "string"),
+                  param in required)
+        for param, definition in properties.items()
+    ]
+
+async def get_user_input_for_param(session, selected_tool, spec):
+    param = spec.name
+    param_desc = spec.description
+    default_val = spec.default
+    choices = spec.choices
+    type_hint = spec.type_hint
+    is_required = spec.required
 
     if "click" in selected_tool.name.lower() and "selector" in param.lower():
         elements, error = await get_clickable_elements_data(session)
@@ -266,7 +643,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
                 print(f"{i + 1:2d}. [{tag.upper()}{type_info}] {text}\n    Selector: {selector}")
             print("=" * 80)
             while True:
-                user_input = input(f"Choose (1-{len(elements)}) | 'm' manual: ").strip()
+                user_input = (await ainput(f"Choose (1-{len(elements)}) | 'm' manual: ")).strip()
                 if user_input.lower() == 'm':
                     break
                 try:
@@ -284,7 +661,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
             print(f"{i + 1}. {choice}")
         while True:
             try:
-                selected = int(input(f"Select a value (1-{len(choices)}): ")) - 1
+                selected = int(await ainput(f"Select a value (1-{len(choices)}): ")) - 1
                 if 0 <= selected < len(choices):
                     return choices[selected]
                 else:
@@ -302,7 +679,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
     prompt += ": "
 
     while True:
-        user_input = input(prompt).strip()
+        user_input = (await ainput(prompt)).strip()
         if user_input:
             try:
                 return cast_input_to_type(user_input, type_hint)
@@ -315,12 +692,12 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
         else:
             print("❌ This field is required. Please enter a value.")
 
-async def manual_tool_mode(session, all_tools):
+async def manual_tool_mode(session, visible_tools):
     while True:
-        visible_tools = show_tools_menu(all_tools)
+        show_tools_menu(visible_tools)
         while True:
             try:
-                selection = input("\nSelect tool: ").strip()
+                selection = (await ainput("\nSelect tool: ")).strip()
                 if selection.lower() == 'b':
                     return
                 elif selection.lower() == 'h':
@@ -337,20 +714,14 @@ async def manual_tool_mode(session, all_tools):
 
         print(f"\n🔧 CONFIGURING: {selected_tool.name}\n📝 Description: {selected_tool.description}\n" + "-" * 50)
         args = {}
-        schema = selected_tool.inputSchema
-        if isinstance(schema, dict) and schema:
-            properties = schema.get("properties", {})
-            required = schema.get("required", [])
-            if not properties:
-                print("✅ This tool requires no parameters.")
-            else:
-                for param, definition in properties.items():
-                    is_required = param in required
-                    value = await get_user_input_for_param(session, selected_tool, param, definition, is_required)
-                    if value is not None:
-                        args[param] = value
-        else:
+        specs = build_param_specs(selected_tool.inputSchema)
+        if not specs:
             print("✅ This tool requires no parameters.")
+        else:
+            for spec in specs:
+                value = await get_user_input_for_param(session, selected_tool, spec)
+                if value is not None:
+                    args[spec.name] = value
 
         print(f"\n⚡ EXECUTING: {selected_tool.name}")
         if args:
@@ -358,6 +729,7 @@ async def manual_tool_mode(session, all_tools):
         print("-" * 50)
         try:
             result = await session.call_tool(selected_tool.name, arguments=args)
+            _invalidate_element_cache(selected_tool.name, args)
             print("📋 RESULT:")
             for content_item in getattr(result, "content", []):
                 text = getattr(content_item, "text", None)
@@ -372,9 +744,9 @@ async def manual_tool_mode(session, all_tools):
         except Exception as e:
             print(f"❌ Error executing tool: {e}")
             logging.error(f"Tool execution error: {e}")
-        input("\n🔄 Press Enter to continue...")
+        await ainput("\n🔄 Press Enter to continue...")
 
-async def ai_assistant_mode(session, all_tools):
+async def ai_assistant_mode(session, visible_tools, agent=None):
     print("\n🤖 Starting AI Assistant Mode...")
     print("Type your requests in natural language. Examples:")
     print("- 'Go to google.com'")
@@ -387,13 +759,16 @@ async def ai_assistant_mode(session, all_tools):
         print("❌ GEMINI_API_KEY not found in environment variables.")
         print("Please add your Gemini API key to your .env file:")
         print("GEMINI_API_KEY=your_api_key_here")
-        input("Press Enter to continue...")
-        return
-    agent = GeminiMCPAgent(session, all_tools)
+        await ainput("Press Enter to continue...")
+        return agent
+    if agent is None:
+        # Built once per connection and handed back to the menu loop, so
+        # re-entering AI mode keeps the chat history and caches warm
+        agent = GeminiMCPAgent(session, visible_tools)
     while True:
         try:
-            user_input = input("🗣️ You: ").strip()
-            if user_input.lower() in ['back', 'exit', 'quit']:
+            user_input = (await ainput("🗣️ You: ")).strip()
+            if user_input.lower() in _EXIT_COMMANDS:
                 break
             if not user_input:
                 continue
@@ -404,6 +779,7 @@ async def ai_assistant_mode(session, all_tools):
         except Exception as e:
             print(f"❌ Error: {e}")
             logging.error(f"AI assistant error: {e}")
+    return agent
 
 async def run_script():
     server_params = StdioServerParameters(command="python", args=["mcp_server.py"], env=None)
@@ -416,17 +792,21 @@ async def run_script():
                 print("📋 Fetching available tools...")
                 response = await session.list_tools()
                 all_tools = response.tools
+                # Filter hidden tools once; every consumer below expects the
+                # already-filtered tuple
+                visible_tools = tuple(t for t in all_tools if t.name not in HIDDEN_TOOLS)
                 if not all_tools:
                     print("❌ No tools available from the server.")
                     return
+                agent = None
                 while True:
                     show_main_menu()
                     try:
-                        choice = input("\nSelect option (1-4): ").strip()
+                        choice = (await ainput("\nSelect option (1-4): ")).strip()
                         if choice == '1':
-                            await ai_assistant_mode(session, all_tools)
+                            agent = await ai_assistant_mode(session, visible_tools, agent)
                         elif choice == '2':
-                            await manual_tool_mode(session, all_tools)
+                            await manual_tool_mode(session, visible_tools)
                         elif choice == '3':
                             print("\n📖 Help:")
                             print("1. AI Assistant Mode: Use natural language to control browser")
@@ -434,7 +814,7 @@ async def run_script():
                             print("3. This help menu")
                             print("4. Quit the application")
                             print("\nFor AI mode, you need a GEMINI_API_KEY in your .env file")
-                            input("Press Enter to continue...")
+                            await ainput("Press Enter to continue...")
                         elif choice == '4':
                             print("👋 Goodbye!")
                             return
@@ -448,4 +828,7 @@ async def run_script():
         logging.error(f"MCP connection error: {e}")
 
 if __name__ == "__main__":
+    # Configure logging only when run as the entry point, so importing this
+    # module does not reconfigure the root logger
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s: %(message)s")
     asyncio.run(run_script())
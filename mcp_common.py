@@ -0,0 +1,35 @@
+"""Helpers shared by the interactive MCP clients.
+
+Both entry points (mcp_client.py and minimal_client.py) used to carry their
+own copies of these; keeping one definition avoids divergence and redundant
+module setup on import.
+"""
+import asyncio
+
+# Tools that should be hidden from the user menu (internal/utility tools)
+HIDDEN_TOOLS = frozenset({
+    'evaluate_javascript',  # Used internally by get_clickable_elements and other tools
+    'wait_for_element',     # Used internally by click_element and other tools
+    'get_form_elements',    # Used internally by form filling interface
+})
+
+async def ainput(prompt: str = "") -> str:
+    """Prompt for input without blocking the event loop.
+
+    Bare input() would stall the asyncio loop while the user types, starving
+    MCP notifications and any background tasks.
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, input, prompt)
+
+def cast_input_to_type(value: str, type_hint: str):
+    try:
+        if type_hint == "integer":
+            return int(value)
+        elif type_hint == "number":
+            return float(value)
+        elif type_hint == "boolean":
+            return value.lower() in ["true", "1", "yes", "y"]
+        else:
+            return value
+    except ValueError:
+        raise ValueError(f"Invalid input '{value}' for expected type {type_hint}")
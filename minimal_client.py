@@ -5,33 +5,17 @@ from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 import json
 
-load_dotenv()
+import mcp_common
+from mcp_common import ainput, cast_input_to_type
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s: %(message)s")
+load_dotenv()
 
-# Tools that should be hidden from the user menu (internal/utility tools)
-HIDDEN_TOOLS = {
-    'evaluate_javascript',  # Used internally by get_clickable_elements and other tools
-    'wait_for_element',     # Used internally by click_element and other tools
-    'get_form_elements',    # Used internally by form filling interface
+# Shared internal tools plus the element-browsing tools this client wraps itself
+HIDDEN_TOOLS = mcp_common.HIDDEN_TOOLS | {
     'get_clickable_elements',  # Now hidden from menu
     'list_links_with_context', # Now hidden from menu
 }
 
-def cast_input_to_type(value: str, type_hint: str):
-    try:
-        if type_hint == "integer":
-            return int(value)
-        elif type_hint == "number":
-            return float(value)
-        elif type_hint == "boolean":
-            return value.lower() in ["true", "1", "yes", "y"]
-        else:
-            return value
-    except ValueError:
-        raise ValueError(f"Invalid input '{value}' for expected type {type_hint}")
-
 def show_tools_menu(available_tools):
     """Display tools in a compact format, excluding internal tools"""
     # Filter out hidden tools
@@ -66,6 +50,9 @@ async def get_clickable_elements_data(session):
     except Exception as e:
         return [], f"Failed to fetch elements: {str(e)}"
 
+# Result substrings that mean a click did not land
+_CLICK_FAILURE_HINTS = ('not clickable', 'not found')
+
 async def click_element_with_force(session, selector):
     """Try normal click, then force click, then navigation fallback for <a> tags."""
     try:
@@ -73,10 +60,11 @@ async def click_element_with_force(session, selector):
         if hasattr(result, "content") and result.content:
             for content_item in result.content:
                 text = getattr(content_item, "text", "")
-                if "not clickable" in text.lower() or "not found" in text.lower():
+                text_lower = text.lower()
+                if any(hint in text_lower for hint in _CLICK_FAILURE_HINTS):
                     print(f"⚠️ {text}")
                     while True:
-                        choice = input("Try force click? (y/N), 'n' for navigation fallback, or 'b' to go back: ").strip().lower()
+                        choice = (await ainput("Try force click? (y/N), 'n' for navigation fallback, or 'b' to go back: ")).strip().lower()
                         if choice == "b":
                             return "_back_"
                         if choice == "y":
@@ -111,7 +99,7 @@ async def click_element_with_force(session, selector):
                                     fc_text = getattr(fc, 'text', fc)
                                     print(f"⚡ Force click result: {fc_text}")
                                     if "not found" in str(fc_text).lower():
-                                        back2 = input("Force click failed. Type 'b' to go back or Enter to continue: ").strip().lower()
+                                        back2 = (await ainput("Force click failed. Type 'b' to go back or Enter to continue: ")).strip().lower()
                                         if back2 == "b":
                                             return "_back_"
                             else:
@@ -456,7 +444,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
                 print()
         print("=" * 100)
         while True:
-            user_input = input(f"Enter element index (1-{len(elements)}) [or 'q' to quit]: ").strip()
+            user_input = (await ainput(f"Enter element index (1-{len(elements)}) [or 'q' to quit]: ")).strip()
             if user_input.lower() == 'q':
                 print("👋 Exiting...")
                 return
@@ -504,7 +492,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
                 print()
         print("=" * 100)
         while True:
-            user_input = input(f"Enter link index (1-{len(links)}) [or 'q' to quit]: ").strip()
+            user_input = (await ainput(f"Enter link index (1-{len(links)}) [or 'q' to quit]: ")).strip()
             if user_input.lower() == 'q':
                 print("👋 Exiting...")
                 return
@@ -552,7 +540,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
                     print()
             print("=" * 80)
             while True:
-                user_input = input(f"Choose (1-{len(elements)}) | 'm' manual | 'i' index click | 's' screenshot | 'r' refresh | 'p' page info [or 'q' to quit]: ").strip()
+                user_input = (await ainput(f"Choose (1-{len(elements)}) | 'm' manual | 'i' index click | 's' screenshot | 'r' refresh | 'p' page info [or 'q' to quit]: ")).strip()
                 if user_input.lower() == 'q':
                     print("👋 Exiting...")
                     return
@@ -575,7 +563,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
                         print(f"Preview: {page_info['visible_text_preview'][:200]}...")
                     continue
                 elif user_input.lower() == 'i':
-                    idx = input(f"Enter index (0-{len(elements)-1}): ").strip()
+                    idx = (await ainput(f"Enter index (0-{len(elements)-1}): ")).strip()
                     try:
                         idx = int(idx)
                         chosen_element = elements[idx]
@@ -605,7 +593,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
         else:
             print("⚠️ No clickable elements found on the current page.")
             while True:
-                debug_choice = input("Debug options: 's' screenshot | 'p' page info | 'm' manual input | 'r' retry [or 'q' to quit]: ").strip().lower()
+                debug_choice = (await ainput("Debug options: 's' screenshot | 'p' page info | 'm' manual input | 'r' retry [or 'q' to quit]: ")).strip().lower()
                 if debug_choice == 'q':
                     print("👋 Exiting...")
                     return
@@ -633,7 +621,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
         print("3. ✏️  Manual selector input")
         
         while True:
-            choice = input("Choose option (1-3) [or 'q' to quit]: ").strip()
+            choice = (await ainput("Choose option (1-3) [or 'q' to quit]: ")).strip()
             if choice.lower() == 'q':
                 print("👋 Exiting...")
                 return
@@ -667,7 +655,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
                     print("=" * 80)
                     
                     while True:
-                        user_input = input(f"Choose (1-{len(elements)}) | 'b' back | 's' screenshot [or 'q' to quit]: ").strip()
+                        user_input = (await ainput(f"Choose (1-{len(elements)}) | 'b' back | 's' screenshot [or 'q' to quit]: ")).strip()
                         if user_input.lower() == 'q':
                             print("👋 Exiting...")
                             return
@@ -719,7 +707,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
                 
                 print("\n" + "=" * 60)
                 
-                action = input("Actions: 'f' full text | 'h' headings only | 'p' paragraphs only | 'b' back [or 'q' to quit]: ").strip().lower()
+                action = (await ainput("Actions: 'f' full text | 'h' headings only | 'p' paragraphs only | 'b' back [or 'q' to quit]: ")).strip().lower()
                 
                 if action == 'q':
                     print("👋 Exiting...")
@@ -782,7 +770,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
                         print()
             print("=" * 90)
             while True:
-                user_input = input(f"Choose (1-{len(elements)}) | 'd' details | 'm' manual | 's' screenshot | 'r' refresh | 'p' page info [or 'q' to quit]: ").strip()
+                user_input = (await ainput(f"Choose (1-{len(elements)}) | 'd' details | 'm' manual | 's' screenshot | 'r' refresh | 'p' page info [or 'q' to quit]: ")).strip()
                 if user_input.lower() == 'q':
                     print("👋 Exiting...")
                     return
@@ -805,7 +793,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
                         print(f"Preview: {page_info['visible_text_preview'][:200]}...")
                     continue
                 elif user_input.lower() == 'd':
-                    detail_input = input(f"Show details for element (1-{len(elements)}) [or 'q' to quit]: ").strip()
+                    detail_input = (await ainput(f"Show details for element (1-{len(elements)}) [or 'q' to quit]: ")).strip()
                     if detail_input.lower() == 'q':
                         print("👋 Exiting...")
                         return
@@ -840,7 +828,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
         else:
             print("⚠️ No form elements found on the current page.")
             while True:
-                debug_choice = input("Debug options: 's' screenshot | 'p' page info | 'm' manual input | 'r' retry [or 'q' to quit]: ").strip().lower()
+                debug_choice = (await ainput("Debug options: 's' screenshot | 'p' page info | 'm' manual input | 'r' retry [or 'q' to quit]: ")).strip().lower()
                 if debug_choice == 'q':
                     print("👋 Exiting...")
                     return
@@ -877,7 +865,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
             prompt += " [REQUIRED]"
         prompt += " [or 'q' to quit]: "
         while True:
-            user_input = input(prompt).strip()
+            user_input = (await ainput(prompt)).strip()
             if user_input.lower() == 'q':
                 print("👋 Exiting...")
                 return
@@ -898,7 +886,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
         for i, choice in enumerate(choices):
             print(f"{i + 1}. {choice}")
         while True:
-            selected = input(f"Select a value (1-{len(choices)}) [or 'q' to quit]: ")
+            selected = await ainput(f"Select a value (1-{len(choices)}) [or 'q' to quit]: ")
             if selected.lower() == 'q':
                 print("👋 Exiting...")
                 return
@@ -920,7 +908,7 @@ async def get_user_input_for_param(session, selected_tool, param, definition, is
         prompt += " [REQUIRED]"
     prompt += " [or 'q' to quit]: "
     while True:
-        user_input = input(prompt).strip()
+        user_input = (await ainput(prompt)).strip()
         if user_input.lower() == 'q':
             print("👋 Exiting...")
             return
@@ -965,7 +953,7 @@ async def browse_and_click_link(session):
             print()
     print("=" * 100)
     while True:
-        user_input = input("Select a link by number or text [or 'q' to quit]: ").strip()
+        user_input = (await ainput("Select a link by number or text [or 'q' to quit]: ")).strip()
         if user_input.lower() == 'q':
             print("👋 Exiting link selection...")
             return
@@ -1007,7 +995,7 @@ async def run_script():
                     visible_tools = show_tools_menu(all_tools)
                     while True:
                         try:
-                            selection = input("\nSelect tool [or 'q' to quit]: ").strip()
+                            selection = (await ainput("\nSelect tool [or 'q' to quit]: ")).strip()
                             if selection.lower() == 'q':
                                 print("👋 Exiting...")
                                 return
@@ -1059,7 +1047,7 @@ async def run_script():
                                     if value is not None:
                                         args[param] = value
                                 else:
-                                    value = input(f"\n📝 Enter '{param}' [or 'q' to quit]: ").strip()
+                                    value = (await ainput(f"\n📝 Enter '{param}' [or 'q' to quit]: ")).strip()
                                     if value.lower() == 'q':
                                         print("👋 Exiting...")
                                         return
@@ -1090,7 +1078,7 @@ async def run_script():
                     except Exception as e:
                         print(f"❌ Error executing tool: {e}")
                         logging.error(f"Tool execution error: {e}")
-                    cont = input("\n🔄 Press Enter to continue... [or 'q' to quit]: ")
+                    cont = await ainput("\n🔄 Press Enter to continue... [or 'q' to quit]: ")
                     if cont.lower() == 'q':
                         print("👋 Exiting...")
                         return
@@ -1099,4 +1087,7 @@ async def run_script():
         logging.error(f"MCP connection error: {e}")
 
 if __name__ == "__main__":
+    # Configure logging only when run as the entry point, so importing this
+    # module does not reconfigure the root logger
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s: %(message)s")
     asyncio.run(run_script())
\ No newline at end of file